@@ -10,10 +10,230 @@
 import math
 import copy
 import warnings
+from bisect import bisect_left, bisect_right
+import numpy as np
 from geomdl import abstract, helpers, linalg, compatibility
 from geomdl import _operations as ops
 from geomdl.exceptions import GeomdlException
 from geomdl._utilities import export
+from geomdl_mod import _operations_numba as nbops
+
+# Axis permutations between the [w][u][v] control points order and the [u][w][v], [v][w][u], [w][u][v] orders
+_VOLUME_PACK_AXES = ((1, 0, 2, 3), (2, 0, 1, 3), (0, 1, 2, 3))
+_VOLUME_UNPACK_AXES = ((1, 0, 2, 3), (1, 2, 0, 3), (0, 1, 2, 3))
+
+# Knot refinement kernels specialized by the dimension of the (weighted) control points
+_KNOT_REFINEMENT_KERNELS = {3: nbops.knot_refinement_curves_d3, 4: nbops.knot_refinement_curves_d4}
+
+
+def _ctrlpts_array(obj):
+    """ Returns the (weighted) control points of the spline geometry as a contiguous float64 array.
+
+    :param obj: spline geometry
+    :type obj: abstract.SplineGeometry
+    :return: control points in [num_ctrlpts][dimension] format
+    :rtype: numpy.ndarray
+    """
+    cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
+    return np.ascontiguousarray(cpts, dtype=np.float64)
+
+
+def _find_multiplicity(knot, knot_vector, tol=10e-8):
+    """ Finds knot multiplicity over the knot vector using binary search.
+
+    Equivalent to :func:`.helpers.find_multiplicity` for sorted knot vectors.
+
+    :param knot: knot or parameter, :math:`u`
+    :type knot: float
+    :param knot_vector: knot vector, :math:`U`
+    :type knot_vector: list, tuple
+    :param tol: tolerance (delta) value for equality checking
+    :type tol: float
+    :return: knot multiplicity, :math:`s`
+    :rtype: int
+    """
+    return bisect_right(knot_vector, knot + tol) - bisect_left(knot_vector, knot - tol)
+
+
+def _find_span(degree, knot_vector, num_ctrlpts, knot):
+    """ Finds the span of a single knot over the knot vector using binary search.
+
+    Equivalent to :func:`.helpers.find_span_linear` for sorted knot vectors.
+
+    :param degree: degree, :math:`p`
+    :type degree: int
+    :param knot_vector: knot vector, :math:`U`
+    :type knot_vector: list, tuple
+    :param num_ctrlpts: number of control points, :math:`n + 1`
+    :type num_ctrlpts: int
+    :param knot: knot or parameter, :math:`u`
+    :type knot: float
+    :return: knot span
+    :rtype: int
+    """
+    return max(min(bisect_right(knot_vector, knot), num_ctrlpts), degree + 1) - 1
+
+
+def _knot_insertion_curves(degree, knotvector, ctrlpts, u, num, s, span):
+    """ Computes the control points of a batch of iso-curves after knot insertion using the Numba kernels.
+
+    Cubic curves with 4-dimensional (i.e. weighted 3-dimensional) control points are dispatched to a specialization
+    of the kernel with the degree and the dimension fixed at compile time.
+
+    :param degree: degree
+    :type degree: int
+    :param knotvector: knot vector
+    :type knotvector: list, tuple
+    :param ctrlpts: control points in [num_curves][num_ctrlpts][dimension] format
+    :type ctrlpts: numpy.ndarray
+    :param u: knot to be inserted
+    :type u: float
+    :param num: number of knot insertions
+    :type num: int
+    :param s: multiplicity of the knot
+    :type s: int
+    :param span: knot span
+    :type span: int
+    :return: updated control points in [num_curves][num_ctrlpts + num][dimension] format
+    :rtype: numpy.ndarray
+    """
+    # The kernels are only defined for a valid number of insertions, so check it even if check_num is disabled
+    if num > degree - s:
+        raise GeomdlException("Knot " + str(u) + " cannot be inserted " + str(num) + " times",
+                              data=dict(knot=u, num=num, multiplicity=s))
+
+    knotvector = np.asarray(knotvector, dtype=np.float64)
+    ctrlpts = np.ascontiguousarray(ctrlpts, dtype=np.float64)
+    if degree == 3 and ctrlpts.shape[2] == 4:
+        return nbops.knot_insertion_curves_p3_d4(knotvector, ctrlpts, float(u), num, s, span)
+    return nbops.knot_insertion_curves(degree, knotvector, ctrlpts, float(u), num, s, span)
+
+
+def _knot_refinement_curves(degree, knotvector, ctrlpts, density):
+    """ Computes the knot vector and the control points of a batch of iso-curves after knot refinement.
+
+    The knots to be inserted are found in the same way as :func:`.helpers.knot_refinement`, i.e. the middle knots of
+    the internal knot spans are added ``density`` times, and then the refinement is computed by the Numba kernel.
+
+    :param degree: degree
+    :type degree: int
+    :param knotvector: knot vector
+    :type knotvector: list, tuple
+    :param ctrlpts: control points in [num_curves][num_ctrlpts][dimension] format
+    :type ctrlpts: numpy.ndarray
+    :param density: density of the knots
+    :type density: int
+    :return: updated control points in [num_curves][num_ctrlpts][dimension] format and the updated knot vector
+    :rtype: tuple
+    """
+    # Input validity checking
+    if not isinstance(density, int):
+        raise GeomdlException("Density value must be an integer", data=dict(density=density))
+
+    if density < 1:
+        raise GeomdlException("Density value cannot be less than 1", data=dict(density=density))
+
+    # Sort the internal knots and make sure that the values are unique
+    knot_list = np.array(sorted(set(knotvector[degree:-degree])), dtype=np.float64)
+
+    # Increase knot density; the size of the refined list is known, so fill it instead of growing a list
+    for _ in range(density):
+        rknots = np.empty(2 * knot_list.size - 1)
+        rknots[0::2] = knot_list
+        rknots[1::2] = knot_list[:-1] + ((knot_list[1:] - knot_list[:-1]) / 2.0)
+        knot_list = rknots
+
+    # Find how many knot insertions are necessary
+    mults = [max(degree - _find_multiplicity(mk, knotvector), 0) for mk in knot_list.tolist()]
+    knots = np.repeat(knot_list, mults)
+
+    # Check if the knot refinement is possible
+    if knots.size == 0:
+        raise GeomdlException("Cannot refine knot vector on this parametric dimension")
+
+    # Use the kernels compiled for a fixed dimension for the non-rational and rational 3-dimensional geometries
+    ctrlpts = np.ascontiguousarray(ctrlpts, dtype=np.float64)
+    kernel = _KNOT_REFINEMENT_KERNELS.get(ctrlpts.shape[2], nbops.knot_refinement_curves)
+    new_ctrlpts, new_kv = kernel(degree, np.asarray(knotvector, dtype=np.float64), ctrlpts, knots, 10e-8)
+    return new_ctrlpts, new_kv.tolist()
+
+
+def _refine_axis(cpts, shape, axis, degree, knotvector, density):
+    """ Applies knot refinement along one parametric axis of a control points grid.
+
+    The refined axis is moved next to the coordinates axis, so that the grid becomes a batch of iso-curves for
+    :func:`_knot_refinement_curves`, and then moved back to its original position.
+
+    :param cpts: control points in [num_ctrlpts][dimension] format
+    :type cpts: numpy.ndarray
+    :param shape: shape of the control points grid, e.g. (size_w, size_u, size_v) for volumes
+    :type shape: tuple
+    :param axis: index of the axis to be refined in ``shape``
+    :type axis: int
+    :param degree: degree on the refined axis
+    :type degree: int
+    :param knotvector: knot vector on the refined axis
+    :type knotvector: list, tuple
+    :param density: density of the knots
+    :type density: int
+    :return: updated control points in [num_ctrlpts][dimension] format, new size of the axis and the updated knot vector
+    :rtype: tuple
+    """
+    dim = cpts.shape[-1]
+    grid = np.moveaxis(cpts.reshape(*shape, dim), axis, -2)
+
+    # Apply knot refinement to all curves at once
+    new_grid, new_kv = _knot_refinement_curves(degree, knotvector, grid.reshape(-1, shape[axis], dim), density)
+
+    # Restore the order of the axes
+    new_grid = np.moveaxis(new_grid.reshape(*grid.shape[:-2], -1, dim), -2, axis)
+    return new_grid.reshape(-1, dim), new_grid.shape[axis], new_kv
+
+
+def _pack_volume(cpts, size_u, size_v, size_w, axis):
+    """ Reorders the control points of a volume into a 2-dimensional structure along the given parametric axis.
+
+    The output is indexed as ``[u][v + (w * size_v)]``, ``[v][u + (w * size_u)]`` or ``[w][v + (u * size_v)]``
+    for the u-, v- and w-directions, respectively.
+
+    :param cpts: control points in [num_ctrlpts][dimension] format
+    :type cpts: numpy.ndarray
+    :param size_u: number of control points on the u-direction
+    :type size_u: int
+    :param size_v: number of control points on the v-direction
+    :type size_v: int
+    :param size_w: number of control points on the w-direction
+    :type size_w: int
+    :param axis: parametric axis; 0, 1, 2 correspond to u, v, w respectively
+    :type axis: int
+    :return: control points in [size_axis][num_ctrlpts / size_axis][dimension] format
+    :rtype: numpy.ndarray
+    """
+    dim = cpts.shape[-1]
+    cpts = cpts.reshape(size_w, size_u, size_v, dim).transpose(_VOLUME_PACK_AXES[axis])
+    return cpts.reshape(cpts.shape[0], -1, dim)
+
+
+def _unpack_volume(ctrlpts, size_u, size_v, size_w, axis):
+    """ Flattens the output of :func:`_pack_volume` back to the volume control points order.
+
+    :param ctrlpts: control points in [size_axis][num_ctrlpts / size_axis][dimension] format
+    :type ctrlpts: numpy.ndarray
+    :param size_u: number of control points on the u-direction
+    :type size_u: int
+    :param size_v: number of control points on the v-direction
+    :type size_v: int
+    :param size_w: number of control points on the w-direction
+    :type size_w: int
+    :param axis: parametric axis; 0, 1, 2 correspond to u, v, w respectively
+    :type axis: int
+    :return: control points in [num_ctrlpts][dimension] format
+    :rtype: numpy.ndarray
+    """
+    dim = ctrlpts.shape[-1]
+    shape = [(size_w, size_u, size_v)[i] for i in _VOLUME_PACK_AXES[axis][:3]]
+    ctrlpts = ctrlpts.reshape(*shape, dim).transpose(_VOLUME_UNPACK_AXES[axis])
+    return ctrlpts.reshape(-1, dim)
 
 
 @export
@@ -67,26 +287,34 @@ def insert_knot(obj, param, num, **kwargs):
                 raise GeomdlException('Number of insertions must be a positive integer value',
                                       data=dict(idx=idx, num=val))
 
+    # Find the parametric directions to be processed
+    active_dirs = tuple(i for i in range(obj.pdimension) if param[i] is not None and num[i] > 0)
+    if not active_dirs:
+        return obj
+
     # Start curve knot insertion
     if isinstance(obj, abstract.Curve):
-        if param[0] is not None and num[0] > 0:
+        if 0 in active_dirs:
+            # Cache geometry properties
+            degree, knotvector = obj.degree, obj.knotvector
+
             # Find knot multiplicity
-            s = helpers.find_multiplicity(param[0], obj.knotvector)
+            s = _find_multiplicity(param[0], knotvector)
 
             # Check if it is possible add that many number of knots
-            if check_num and num[0] > obj.degree - s:
+            if check_num and num[0] > degree - s:
                 raise GeomdlException("Knot " + str(param[0]) + " cannot be inserted " + str(num[0]) + " times",
                                       data=dict(knot=param[0], num=num[0], multiplicity=s))
 
             # Find knot span
-            span = helpers.find_span_linear(obj.degree, obj.knotvector, obj.ctrlpts_size, param[0])
+            span = _find_span(degree, knotvector, obj.ctrlpts_size, param[0])
 
             # Compute new knot vector
-            kv_new = helpers.knot_insertion_kv(obj.knotvector, param[0], span, num[0])
+            kv_new = helpers.knot_insertion_kv(knotvector, param[0], span, num[0])
 
             # Compute new control points
             cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
-            cpts_tmp = helpers.knot_insertion(obj.degree, obj.knotvector, cpts, param[0],
+            cpts_tmp = helpers.knot_insertion(degree, knotvector, cpts, param[0],
                                               num=num[0], s=s, span=span)
 
             # Update curve
@@ -95,194 +323,178 @@ def insert_knot(obj, param, num, **kwargs):
 
     # Start surface knot insertion
     if isinstance(obj, abstract.Surface):
+        # Use Pw if rational; the array is updated by each direction and passed on to the next one
+        cpts = _ctrlpts_array(obj)
+
         # u-direction
-        if param[0] is not None and num[0] > 0:
+        if 0 in active_dirs:
+            # Cache geometry properties
+            size_u, size_v = obj.ctrlpts_size_u, obj.ctrlpts_size_v
+            degree_u, knotvector_u = obj.degree_u, obj.knotvector_u
+
             # Find knot multiplicity
-            s_u = helpers.find_multiplicity(param[0], obj.knotvector_u)
+            s_u = _find_multiplicity(param[0], knotvector_u)
 
             # Check if it is possible add that many number of knots
-            if check_num and num[0] > obj.degree_u - s_u:
+            if check_num and num[0] > degree_u - s_u:
                 raise GeomdlException("Knot " + str(param[0]) + " cannot be inserted " + str(num[0]) + " times (u-dir)",
                                       data=dict(knot=param[0], num=num[0], multiplicity=s_u))
 
             # Find knot span
-            span_u = helpers.find_span_linear(obj.degree_u, obj.knotvector_u, obj.ctrlpts_size_u, param[0])
+            span_u = _find_span(degree_u, knotvector_u, size_u, param[0])
 
             # Compute new knot vector
-            kv_u = helpers.knot_insertion_kv(obj.knotvector_u, param[0], span_u, num[0])
+            kv_u = helpers.knot_insertion_kv(knotvector_u, param[0], span_u, num[0])
 
             # Get curves
-            cpts_tmp = []
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
-            for v in range(obj.ctrlpts_size_v):
-                ccu = [cpts[v + (obj.ctrlpts_size_v * u)] for u in range(obj.ctrlpts_size_u)]
-                ctrlpts_tmp = helpers.knot_insertion(obj.degree_u, obj.knotvector_u, ccu, param[0],
-                                                     num=num[0], s=s_u, span=span_u)
-                cpts_tmp += ctrlpts_tmp
+            dim = cpts.shape[1]
+            ccu = cpts.reshape(size_u, size_v, dim).transpose(1, 0, 2)
+
+            # Compute new control points of all curves at once
+            ctrlpts_tmp = _knot_insertion_curves(degree_u, knotvector_u, ccu, param[0], num[0], s_u, span_u)
+            cpts = ctrlpts_tmp.transpose(1, 0, 2).reshape(-1, dim)
 
             # Update the surface after knot insertion
-            obj.set_ctrlpts(compatibility.flip_ctrlpts_u(cpts_tmp, obj.ctrlpts_size_u + num[0], obj.ctrlpts_size_v),
-                            obj.ctrlpts_size_u + num[0], obj.ctrlpts_size_v)
+            obj.set_ctrlpts(cpts.tolist(), size_u + num[0], size_v)
             obj.knotvector_u = kv_u
 
         # v-direction
-        if param[1] is not None and num[1] > 0:
+        if 1 in active_dirs:
+            # Cache geometry properties
+            size_u, size_v = obj.ctrlpts_size_u, obj.ctrlpts_size_v
+            degree_v, knotvector_v = obj.degree_v, obj.knotvector_v
+
             # Find knot multiplicity
-            s_v = helpers.find_multiplicity(param[1], obj.knotvector_v)
+            s_v = _find_multiplicity(param[1], knotvector_v)
 
             # Check if it is possible add that many number of knots
-            if check_num and num[1] > obj.degree_v - s_v:
+            if check_num and num[1] > degree_v - s_v:
                 raise GeomdlException("Knot " + str(param[1]) + " cannot be inserted " + str(num[1]) + " times (v-dir)",
                                       data=dict(knot=param[1], num=num[1], multiplicity=s_v))
 
             # Find knot span
-            span_v = helpers.find_span_linear(obj.degree_v, obj.knotvector_v, obj.ctrlpts_size_v, param[1])
+            span_v = _find_span(degree_v, knotvector_v, size_v, param[1])
 
             # Compute new knot vector
-            kv_v = helpers.knot_insertion_kv(obj.knotvector_v, param[1], span_v, num[1])
+            kv_v = helpers.knot_insertion_kv(knotvector_v, param[1], span_v, num[1])
 
             # Get curves
-            cpts_tmp = []
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
-            for u in range(obj.ctrlpts_size_u):
-                ccv = [cpts[v + (obj.ctrlpts_size_v * u)] for v in range(obj.ctrlpts_size_v)]
-                ctrlpts_tmp = helpers.knot_insertion(obj.degree_v, obj.knotvector_v, ccv, param[1],
-                                                     num=num[1], s=s_v, span=span_v)
-                cpts_tmp += ctrlpts_tmp
+            dim = cpts.shape[1]
+            ccv = cpts.reshape(size_u, size_v, dim)
+
+            # Compute new control points of all curves at once
+            ctrlpts_tmp = _knot_insertion_curves(degree_v, knotvector_v, ccv, param[1], num[1], s_v, span_v)
+            cpts = ctrlpts_tmp.reshape(-1, dim)
 
             # Update the surface after knot insertion
-            obj.set_ctrlpts(cpts_tmp, obj.ctrlpts_size_u, obj.ctrlpts_size_v + num[1])
+            obj.set_ctrlpts(cpts.tolist(), size_u, size_v + num[1])
             obj.knotvector_v = kv_v
 
     # Start volume knot insertion
     if isinstance(obj, abstract.Volume):
+        # Use Pw if rational; the array is updated by each direction and passed on to the next one
+        cpts = _ctrlpts_array(obj)
+
         # u-direction
-        if param[0] is not None and num[0] > 0:
+        if 0 in active_dirs:
+            # Cache geometry properties
+            size_u, size_v, size_w = obj.ctrlpts_size_u, obj.ctrlpts_size_v, obj.ctrlpts_size_w
+            degree_u, knotvector_u = obj.degree_u, obj.knotvector_u
+
             # Find knot multiplicity
-            s_u = helpers.find_multiplicity(param[0], obj.knotvector_u)
+            s_u = _find_multiplicity(param[0], knotvector_u)
 
             # Check if it is possible add that many number of knots
-            if check_num and num[0] > obj.degree_u - s_u:
+            if check_num and num[0] > degree_u - s_u:
                 raise GeomdlException("Knot " + str(param[0]) + " cannot be inserted " + str(num[0]) + " times (u-dir)",
                                       data=dict(knot=param[0], num=num[0], multiplicity=s_u))
 
             # Find knot span
-            span_u = helpers.find_span_linear(obj.degree_u, obj.knotvector_u, obj.ctrlpts_size_u, param[0])
+            span_u = _find_span(degree_u, knotvector_u, size_u, param[0])
 
             # Compute new knot vector
-            kv_u = helpers.knot_insertion_kv(obj.knotvector_u, param[0], span_u, num[0])
-
-            # Use Pw if rational
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
+            kv_u = helpers.knot_insertion_kv(knotvector_u, param[0], span_u, num[0])
 
             # Construct 2-dimensional structure
-            cpt2d = []
-            for u in range(obj.ctrlpts_size_u):
-                temp_surf = []
-                for w in range(obj.ctrlpts_size_w):
-                    for v in range(obj.ctrlpts_size_v):
-                        temp_pt = cpts[v + (u * obj.ctrlpts_size_v) + (w * obj.ctrlpts_size_u * obj.ctrlpts_size_v)]
-                        temp_surf.append(temp_pt)
-                cpt2d.append(temp_surf)
+            cpt2d = _pack_volume(cpts, size_u, size_v, size_w, 0)
 
-            # Compute new control points
-            ctrlpts_tmp = helpers.knot_insertion(obj.degree_u, obj.knotvector_u, cpt2d, param[0],
-                                                 num=num[0], s=s_u, span=span_u)
+            # Compute new control points; the kernel works on curves, so swap the surface and curve axes
+            ctrlpts_tmp = _knot_insertion_curves(degree_u, knotvector_u, cpt2d.transpose(1, 0, 2),
+                                                 param[0], num[0], s_u, span_u)
 
             # Flatten to 1-dimensional structure
-            ctrlpts_new = []
-            for w in range(obj.ctrlpts_size_w):
-                for u in range(obj.ctrlpts_size_u + num[0]):
-                    for v in range(obj.ctrlpts_size_v):
-                        temp_pt = ctrlpts_tmp[u][v + (w * obj.ctrlpts_size_v)]
-                        ctrlpts_new.append(temp_pt)
+            cpts = _unpack_volume(ctrlpts_tmp.transpose(1, 0, 2), size_u + num[0], size_v, size_w, 0)
 
             # Update the volume after knot insertion
-            obj.set_ctrlpts(ctrlpts_new, obj.ctrlpts_size_u + num[0], obj.ctrlpts_size_v, obj.ctrlpts_size_w)
+            obj.set_ctrlpts(cpts.tolist(), size_u + num[0], size_v, size_w)
             obj.knotvector_u = kv_u
 
         # v-direction
-        if param[1] is not None and num[1] > 0:
+        if 1 in active_dirs:
+            # Cache geometry properties
+            size_u, size_v, size_w = obj.ctrlpts_size_u, obj.ctrlpts_size_v, obj.ctrlpts_size_w
+            degree_v, knotvector_v = obj.degree_v, obj.knotvector_v
+
             # Find knot multiplicity
-            s_v = helpers.find_multiplicity(param[1], obj.knotvector_v)
+            s_v = _find_multiplicity(param[1], knotvector_v)
 
             # Check if it is possible add that many number of knots
-            if check_num and num[1] > obj.degree_v - s_v:
+            if check_num and num[1] > degree_v - s_v:
                 raise GeomdlException("Knot " + str(param[1]) + " cannot be inserted " + str(num[1]) + " times (v-dir)",
                                       data=dict(knot=param[1], num=num[1], multiplicity=s_v))
 
             # Find knot span
-            span_v = helpers.find_span_linear(obj.degree_v, obj.knotvector_v, obj.ctrlpts_size_v, param[1])
+            span_v = _find_span(degree_v, knotvector_v, size_v, param[1])
 
             # Compute new knot vector
-            kv_v = helpers.knot_insertion_kv(obj.knotvector_v, param[1], span_v, num[1])
-
-            # Use Pw if rational
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
+            kv_v = helpers.knot_insertion_kv(knotvector_v, param[1], span_v, num[1])
 
             # Construct 2-dimensional structure
-            cpt2d = []
-            for v in range(obj.ctrlpts_size_v):
-                temp_surf = []
-                for w in range(obj.ctrlpts_size_w):
-                    for u in range(obj.ctrlpts_size_u):
-                        temp_pt = cpts[v + (u * obj.ctrlpts_size_v) + (w * obj.ctrlpts_size_u * obj.ctrlpts_size_v)]
-                        temp_surf.append(temp_pt)
-                cpt2d.append(temp_surf)
+            cpt2d = _pack_volume(cpts, size_u, size_v, size_w, 1)
 
-            # Compute new control points
-            ctrlpts_tmp = helpers.knot_insertion(obj.degree_v, obj.knotvector_v, cpt2d, param[1],
-                                                 num=num[1], s=s_v, span=span_v)
+            # Compute new control points; the kernel works on curves, so swap the surface and curve axes
+            ctrlpts_tmp = _knot_insertion_curves(degree_v, knotvector_v, cpt2d.transpose(1, 0, 2),
+                                                 param[1], num[1], s_v, span_v)
 
             # Flatten to 1-dimensional structure
-            ctrlpts_new = []
-            for w in range(obj.ctrlpts_size_w):
-                for u in range(obj.ctrlpts_size_u):
-                    for v in range(obj.ctrlpts_size_v + num[1]):
-                        temp_pt = ctrlpts_tmp[v][u + (w * obj.ctrlpts_size_u)]
-                        ctrlpts_new.append(temp_pt)
+            cpts = _unpack_volume(ctrlpts_tmp.transpose(1, 0, 2), size_u, size_v + num[1], size_w, 1)
 
             # Update the volume after knot insertion
-            obj.set_ctrlpts(ctrlpts_new, obj.ctrlpts_size_u, obj.ctrlpts_size_v + num[1], obj.ctrlpts_size_w)
+            obj.set_ctrlpts(cpts.tolist(), size_u, size_v + num[1], size_w)
             obj.knotvector_v = kv_v
 
         # w-direction
-        if param[2] is not None and num[2] > 0:
+        if 2 in active_dirs:
+            # Cache geometry properties
+            size_u, size_v, size_w = obj.ctrlpts_size_u, obj.ctrlpts_size_v, obj.ctrlpts_size_w
+            degree_w, knotvector_w = obj.degree_w, obj.knotvector_w
+
             # Find knot multiplicity
-            s_w = helpers.find_multiplicity(param[2], obj.knotvector_w)
+            s_w = _find_multiplicity(param[2], knotvector_w)
 
             # Check if it is possible add that many number of knots
-            if check_num and num[2] > obj.degree_w - s_w:
+            if check_num and num[2] > degree_w - s_w:
                 raise GeomdlException("Knot " + str(param[2]) + " cannot be inserted " + str(num[2]) + " times (w-dir)",
                                       data=dict(knot=param[2], num=num[2], multiplicity=s_w))
 
             # Find knot span
-            span_w = helpers.find_span_linear(obj.degree_w, obj.knotvector_w, obj.ctrlpts_size_w, param[2])
+            span_w = _find_span(degree_w, knotvector_w, size_w, param[2])
 
             # Compute new knot vector
-            kv_w = helpers.knot_insertion_kv(obj.knotvector_w, param[2], span_w, num[2])
-
-            # Use Pw if rational
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
+            kv_w = helpers.knot_insertion_kv(knotvector_w, param[2], span_w, num[2])
 
             # Construct 2-dimensional structure
-            cpt2d = []
-            for w in range(obj.ctrlpts_size_w):
-                temp_surf = [cpts[uv + (w * obj.ctrlpts_size_u * obj.ctrlpts_size_v)] for uv in
-                             range(obj.ctrlpts_size_u * obj.ctrlpts_size_v)]
-                cpt2d.append(temp_surf)
+            cpt2d = _pack_volume(cpts, size_u, size_v, size_w, 2)
 
-            # Compute new control points
-            ctrlpts_tmp = helpers.knot_insertion(obj.degree_w, obj.knotvector_w, cpt2d, param[2],
-                                                 num=num[2], s=s_w, span=span_w)
+            # Compute new control points; the kernel works on curves, so swap the surface and curve axes
+            ctrlpts_tmp = _knot_insertion_curves(degree_w, knotvector_w, cpt2d.transpose(1, 0, 2),
+                                                 param[2], num[2], s_w, span_w)
 
             # Flatten to 1-dimensional structure
-            ctrlpts_new = []
-            for w in range(obj.ctrlpts_size_w + num[2]):
-                ctrlpts_new += ctrlpts_tmp[w]
+            cpts = _unpack_volume(ctrlpts_tmp.transpose(1, 0, 2), size_u, size_v, size_w + num[2], 2)
 
             # Update the volume after knot insertion
-            obj.set_ctrlpts(ctrlpts_new, obj.ctrlpts_size_u, obj.ctrlpts_size_v, obj.ctrlpts_size_w + num[2])
+            obj.set_ctrlpts(cpts.tolist(), size_u, size_v, size_w + num[2])
             obj.knotvector_w = kv_w
 
     # Return updated spline geometry
@@ -340,11 +552,19 @@ def remove_knot(obj, param, num, **kwargs):
                 raise GeomdlException('Number of removals must be a positive integer value',
                                       data=dict(idx=idx, num=val))
 
+    # Find the parametric directions to be processed
+    active_dirs = tuple(i for i in range(obj.pdimension) if param[i] is not None and num[i] > 0)
+    if not active_dirs:
+        return obj
+
     # Start curve knot removal
     if isinstance(obj, abstract.Curve):
-        if param[0] is not None and num[0] > 0:
+        if 0 in active_dirs:
+            # Cache geometry properties
+            degree, knotvector = obj.degree, obj.knotvector
+
             # Find knot multiplicity
-            s = helpers.find_multiplicity(param[0], obj.knotvector)
+            s = _find_multiplicity(param[0], knotvector)
 
             # It is impossible to remove knots if num > s
             if check_num and num[0] > s:
@@ -352,14 +572,14 @@ def remove_knot(obj, param, num, **kwargs):
                                       data=dict(knot=param[0], num=num[0], multiplicity=s))
 
             # Find knot span
-            span = helpers.find_span_linear(obj.degree, obj.knotvector, obj.ctrlpts_size, param[0])
+            span = _find_span(degree, knotvector, obj.ctrlpts_size, param[0])
 
             # Compute new control points
             cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
-            ctrlpts_new = helpers.knot_removal(obj.degree, obj.knotvector, cpts, param[0], num=num[0], s=s, span=span)
+            ctrlpts_new = helpers.knot_removal(degree, knotvector, cpts, param[0], num=num[0], s=s, span=span)
 
             # Compute new knot vector
-            kv_new = helpers.knot_removal_kv(obj.knotvector, span, num[0])
+            kv_new = helpers.knot_removal_kv(knotvector, span, num[0])
 
             # Update curve
             obj.set_ctrlpts(ctrlpts_new)
@@ -367,10 +587,18 @@ def remove_knot(obj, param, num, **kwargs):
 
     # Start surface knot removal
     if isinstance(obj, abstract.Surface):
+        # Use Pw if rational; helpers.knot_removal works on lists, so the control points stay in a list which is updated
+        # by each direction and passed on to the next one
+        cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
+
         # u-direction
-        if param[0] is not None and num[0] > 0:
+        if 0 in active_dirs:
+            # Cache geometry properties
+            size_u, size_v = obj.ctrlpts_size_u, obj.ctrlpts_size_v
+            degree_u, knotvector_u = obj.degree_u, obj.knotvector_u
+
             # Find knot multiplicity
-            s_u = helpers.find_multiplicity(param[0], obj.knotvector_u)
+            s_u = _find_multiplicity(param[0], knotvector_u)
 
             # Check if it is possible add that many number of knots
             if check_num and num[0] > s_u:
@@ -378,29 +606,31 @@ def remove_knot(obj, param, num, **kwargs):
                                       data=dict(knot=param[0], num=num[0], multiplicity=s_u))
 
             # Find knot span
-            span_u = helpers.find_span_linear(obj.degree_u, obj.knotvector_u, obj.ctrlpts_size_u, param[0])
+            span_u = _find_span(degree_u, knotvector_u, size_u, param[0])
 
-            # Get curves
-            ctrlpts_new = []
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
-            for v in range(obj.ctrlpts_size_v):
-                ccu = [cpts[v + (obj.ctrlpts_size_v * u)] for u in range(obj.ctrlpts_size_u)]
-                ctrlpts_tmp = helpers.knot_removal(obj.degree_u, obj.knotvector_u, ccu, param[0],
-                                                   num=num[0], s=s_u, span=span_u)
-                ctrlpts_new += ctrlpts_tmp
+            # Compute new control points; the curves on the u-direction are strided slices of the control points
+            knot_removal = helpers.knot_removal
+            ctrlpts_new = [knot_removal(degree_u, knotvector_u, cpts[v::size_v], param[0],
+                                        num=num[0], s=s_u, span=span_u) for v in range(size_v)]
+
+            # Flatten back to the [u][v] order
+            cpts = [pt for u_row in zip(*ctrlpts_new) for pt in u_row]
 
             # Compute new knot vector
-            kv_u = helpers.knot_removal_kv(obj.knotvector_u, span_u, num[0])
+            kv_u = helpers.knot_removal_kv(knotvector_u, span_u, num[0])
 
             # Update the surface after knot removal
-            obj.set_ctrlpts(compatibility.flip_ctrlpts_u(ctrlpts_new, obj.ctrlpts_size_u - num[0], obj.ctrlpts_size_v),
-                            obj.ctrlpts_size_u - num[0], obj.ctrlpts_size_v)
+            obj.set_ctrlpts(cpts, size_u - num[0], size_v)
             obj.knotvector_u = kv_u
 
         # v-direction
-        if param[1] is not None and num[1] > 0:
+        if 1 in active_dirs:
+            # Cache geometry properties
+            size_u, size_v = obj.ctrlpts_size_u, obj.ctrlpts_size_v
+            degree_v, knotvector_v = obj.degree_v, obj.knotvector_v
+
             # Find knot multiplicity
-            s_v = helpers.find_multiplicity(param[1], obj.knotvector_v)
+            s_v = _find_multiplicity(param[1], knotvector_v)
 
             # Check if it is possible add that many number of knots
             if check_num and num[1] > s_v:
@@ -408,30 +638,36 @@ def remove_knot(obj, param, num, **kwargs):
                                       data=dict(knot=param[1], num=num[1], multiplicity=s_v))
 
             # Find knot span
-            span_v = helpers.find_span_linear(obj.degree_v, obj.knotvector_v, obj.ctrlpts_size_v, param[1])
+            span_v = _find_span(degree_v, knotvector_v, size_v, param[1])
 
-            # Get curves
-            ctrlpts_new = []
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
-            for u in range(obj.ctrlpts_size_u):
-                ccv = [cpts[v + (obj.ctrlpts_size_v * u)] for v in range(obj.ctrlpts_size_v)]
-                ctrlpts_tmp = helpers.knot_removal(obj.degree_v, obj.knotvector_v, ccv, param[1],
-                                                   num=num[1], s=s_v, span=span_v)
-                ctrlpts_new += ctrlpts_tmp
+            # Compute new control points; the curves on the v-direction are contiguous slices of the control points
+            knot_removal = helpers.knot_removal
+            ctrlpts_new = [knot_removal(degree_v, knotvector_v, cpts[u * size_v:(u + 1) * size_v], param[1],
+                                        num=num[1], s=s_v, span=span_v) for u in range(size_u)]
+
+            # Flatten in the [u][v] order
+            cpts = [pt for v_row in ctrlpts_new for pt in v_row]
 
             # Compute new knot vector
-            kv_v = helpers.knot_removal_kv(obj.knotvector_v, span_v, num[1])
+            kv_v = helpers.knot_removal_kv(knotvector_v, span_v, num[1])
 
             # Update the surface after knot removal
-            obj.set_ctrlpts(ctrlpts_new, obj.ctrlpts_size_u, obj.ctrlpts_size_v - num[1])
+            obj.set_ctrlpts(cpts, size_u, size_v - num[1])
             obj.knotvector_v = kv_v
 
     # Start volume knot removal
     if isinstance(obj, abstract.Volume):
+        # Use Pw if rational; the array is updated by each direction and passed on to the next one
+        cpts = _ctrlpts_array(obj)
+
         # u-direction
-        if param[0] is not None and num[0] > 0:
+        if 0 in active_dirs:
+            # Cache geometry properties
+            size_u, size_v, size_w = obj.ctrlpts_size_u, obj.ctrlpts_size_v, obj.ctrlpts_size_w
+            degree_u, knotvector_u = obj.degree_u, obj.knotvector_u
+
             # Find knot multiplicity
-            s_u = helpers.find_multiplicity(param[0], obj.knotvector_u)
+            s_u = _find_multiplicity(param[0], knotvector_u)
 
             # Check if it is possible add that many number of knots
             if check_num and num[0] > s_u:
@@ -439,44 +675,33 @@ def remove_knot(obj, param, num, **kwargs):
                                       data=dict(knot=param[0], num=num[0], multiplicity=s_u))
 
             # Find knot span
-            span_u = helpers.find_span_linear(obj.degree_u, obj.knotvector_u, obj.ctrlpts_size_u, param[0])
-
-            # Use Pw if rational
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
+            span_u = _find_span(degree_u, knotvector_u, size_u, param[0])
 
             # Construct 2-dimensional structure
-            cpt2d = []
-            for u in range(obj.ctrlpts_size_u):
-                temp_surf = []
-                for w in range(obj.ctrlpts_size_w):
-                    for v in range(obj.ctrlpts_size_v):
-                        temp_pt = cpts[v + (u * obj.ctrlpts_size_v) + (w * obj.ctrlpts_size_u * obj.ctrlpts_size_v)]
-                        temp_surf.append(temp_pt)
-                cpt2d.append(temp_surf)
+            cpt2d = _pack_volume(cpts, size_u, size_v, size_w, 0).tolist()
 
             # Compute new control points
-            ctrlpts_tmp = helpers.knot_removal(obj.degree_u, obj.knotvector_u, cpt2d, param[0],
+            ctrlpts_tmp = helpers.knot_removal(degree_u, knotvector_u, cpt2d, param[0],
                                                num=num[0], s=s_u, span=span_u)
 
             # Flatten to 1-dimensional structure
-            ctrlpts_new = []
-            for w in range(obj.ctrlpts_size_w):
-                for u in range(obj.ctrlpts_size_u - num[0]):
-                    for v in range(obj.ctrlpts_size_v):
-                        temp_pt = ctrlpts_tmp[u][v + (w * obj.ctrlpts_size_v)]
-                        ctrlpts_new.append(temp_pt)
+            cpts = _unpack_volume(np.asarray(ctrlpts_tmp, dtype=np.float64), size_u - num[0], size_v, size_w, 0)
 
             # Compute new knot vector
-            kv_u = helpers.knot_removal_kv(obj.knotvector_u, span_u, num[0])
+            kv_u = helpers.knot_removal_kv(knotvector_u, span_u, num[0])
 
             # Update the volume after knot removal
-            obj.set_ctrlpts(ctrlpts_new, obj.ctrlpts_size_u - num[0], obj.ctrlpts_size_v, obj.ctrlpts_size_w)
+            obj.set_ctrlpts(cpts.tolist(), size_u - num[0], size_v, size_w)
             obj.knotvector_u = kv_u
 
         # v-direction
-        if param[1] is not None and num[1] > 0:
+        if 1 in active_dirs:
+            # Cache geometry properties
+            size_u, size_v, size_w = obj.ctrlpts_size_u, obj.ctrlpts_size_v, obj.ctrlpts_size_w
+            degree_v, knotvector_v = obj.degree_v, obj.knotvector_v
+
             # Find knot multiplicity
-            s_v = helpers.find_multiplicity(param[1], obj.knotvector_v)
+            s_v = _find_multiplicity(param[1], knotvector_v)
 
             # Check if it is possible add that many number of knots
             if check_num and num[1] > s_v:
@@ -484,44 +709,33 @@ def remove_knot(obj, param, num, **kwargs):
                                       data=dict(knot=param[1], num=num[1], multiplicity=s_v))
 
             # Find knot span
-            span_v = helpers.find_span_linear(obj.degree_v, obj.knotvector_v, obj.ctrlpts_size_v, param[1])
-
-            # Use Pw if rational
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
+            span_v = _find_span(degree_v, knotvector_v, size_v, param[1])
 
             # Construct 2-dimensional structure
-            cpt2d = []
-            for v in range(obj.ctrlpts_size_v):
-                temp_surf = []
-                for w in range(obj.ctrlpts_size_w):
-                    for u in range(obj.ctrlpts_size_u):
-                        temp_pt = cpts[v + (u * obj.ctrlpts_size_v) + (w * obj.ctrlpts_size_u * obj.ctrlpts_size_v)]
-                        temp_surf.append(temp_pt)
-                cpt2d.append(temp_surf)
+            cpt2d = _pack_volume(cpts, size_u, size_v, size_w, 1).tolist()
 
             # Compute new control points
-            ctrlpts_tmp = helpers.knot_removal(obj.degree_v, obj.knotvector_v, cpt2d, param[1],
+            ctrlpts_tmp = helpers.knot_removal(degree_v, knotvector_v, cpt2d, param[1],
                                                num=num[1], s=s_v, span=span_v)
 
             # Flatten to 1-dimensional structure
-            ctrlpts_new = []
-            for w in range(obj.ctrlpts_size_w):
-                for u in range(obj.ctrlpts_size_u):
-                    for v in range(obj.ctrlpts_size_v - num[1]):
-                        temp_pt = ctrlpts_tmp[v][u + (w * obj.ctrlpts_size_u)]
-                        ctrlpts_new.append(temp_pt)
+            cpts = _unpack_volume(np.asarray(ctrlpts_tmp, dtype=np.float64), size_u, size_v - num[1], size_w, 1)
 
             # Compute new knot vector
-            kv_v = helpers.knot_removal_kv(obj.knotvector_v, span_v, num[1])
+            kv_v = helpers.knot_removal_kv(knotvector_v, span_v, num[1])
 
             # Update the volume after knot removal
-            obj.set_ctrlpts(ctrlpts_new, obj.ctrlpts_size_u, obj.ctrlpts_size_v - num[1], obj.ctrlpts_size_w)
+            obj.set_ctrlpts(cpts.tolist(), size_u, size_v - num[1], size_w)
             obj.knotvector_v = kv_v
 
         # w-direction
-        if param[2] is not None and num[2] > 0:
+        if 2 in active_dirs:
+            # Cache geometry properties
+            size_u, size_v, size_w = obj.ctrlpts_size_u, obj.ctrlpts_size_v, obj.ctrlpts_size_w
+            degree_w, knotvector_w = obj.degree_w, obj.knotvector_w
+
             # Find knot multiplicity
-            s_w = helpers.find_multiplicity(param[2], obj.knotvector_w)
+            s_w = _find_multiplicity(param[2], knotvector_w)
 
             # Check if it is possible add that many number of knots
             if check_num and num[2] > s_w:
@@ -529,32 +743,23 @@ def remove_knot(obj, param, num, **kwargs):
                                       data=dict(knot=param[2], num=num[2], multiplicity=s_w))
 
             # Find knot span
-            span_w = helpers.find_span_linear(obj.degree_w, obj.knotvector_w, obj.ctrlpts_size_w, param[2])
-
-            # Use Pw if rational
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
+            span_w = _find_span(degree_w, knotvector_w, size_w, param[2])
 
             # Construct 2-dimensional structure
-            cpt2d = []
-            for w in range(obj.ctrlpts_size_w):
-                temp_surf = [cpts[uv + (w * obj.ctrlpts_size_u * obj.ctrlpts_size_v)] for uv in
-                             range(obj.ctrlpts_size_u * obj.ctrlpts_size_v)]
-                cpt2d.append(temp_surf)
+            cpt2d = _pack_volume(cpts, size_u, size_v, size_w, 2).tolist()
 
             # Compute new control points
-            ctrlpts_tmp = helpers.knot_removal(obj.degree_w, obj.knotvector_w, cpt2d, param[2],
+            ctrlpts_tmp = helpers.knot_removal(degree_w, knotvector_w, cpt2d, param[2],
                                                num=num[2], s=s_w, span=span_w)
 
             # Flatten to 1-dimensional structure
-            ctrlpts_new = []
-            for w in range(obj.ctrlpts_size_w - num[2]):
-                ctrlpts_new += ctrlpts_tmp[w]
+            cpts = _unpack_volume(np.asarray(ctrlpts_tmp, dtype=np.float64), size_u, size_v, size_w - num[2], 2)
 
             # Compute new knot vector
-            kv_w = helpers.knot_removal_kv(obj.knotvector_w, span_w, num[2])
+            kv_w = helpers.knot_removal_kv(knotvector_w, span_w, num[2])
 
             # Update the volume after knot removal
-            obj.set_ctrlpts(ctrlpts_new, obj.ctrlpts_size_u, obj.ctrlpts_size_v, obj.ctrlpts_size_w - num[2])
+            obj.set_ctrlpts(cpts.tolist(), size_u, size_v, size_w - num[2])
             obj.knotvector_w = kv_w
 
     # Return updated spline geometry
@@ -630,139 +835,90 @@ def refine_knotvector(obj, param, **kwargs):
             raise GeomdlException("The length of the param array must be equal to the number of parametric dimensions",
                                   data=dict(pdim=obj.pdimension, param_len=len(param)))
 
+    # Use Pw if rational; the array is updated by each direction and passed on to the next one
+    cpts = _ctrlpts_array(obj)
+
     # Start curve knot refinement
     if isinstance(obj, abstract.Curve):
         if param[0] > 0:    # param is the refinement density in the form [u, v, w] = [#, #, #]
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
-            new_cpts, new_kv = helpers.knot_refinement(obj.degree, obj.knotvector, cpts, density=param[0])
-            obj.set_ctrlpts(new_cpts)
+            # Cache geometry properties
+            degree, knotvector = obj.degree, obj.knotvector
+
+            # Apply knot refinement
+            cpts, _, new_kv = _refine_axis(cpts, (obj.ctrlpts_size,), 0, degree, knotvector, param[0])
+
+            # Update the curve after knot refinement
+            obj.set_ctrlpts(cpts.tolist())
             obj.knotvector = new_kv
 
     # Start surface knot refinement
     if isinstance(obj, abstract.Surface):
         # u-direction
         if param[0] > 0:
-            # Get curves
-            new_cpts = []
-            new_cpts_size = 0
-            new_kv = []
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
-            for v in range(obj.ctrlpts_size_v):
-                ccu = [cpts[v + (obj.ctrlpts_size_v * u)] for u in range(obj.ctrlpts_size_u)]
-                ptmp, new_kv = helpers.knot_refinement(obj.degree_u, obj.knotvector_u, ccu, density=param[0])
-                new_cpts_size = len(ptmp)
-                new_cpts += ptmp
+            # Cache geometry properties
+            size_u, size_v = obj.ctrlpts_size_u, obj.ctrlpts_size_v
+            degree_u, knotvector_u = obj.degree_u, obj.knotvector_u
+
+            # Apply knot refinement along the u-axis of the [u][v] grid
+            cpts, new_size, new_kv = _refine_axis(cpts, (size_u, size_v), 0, degree_u, knotvector_u, param[0])
 
             # Update the surface after knot refinement
-            obj.set_ctrlpts(compatibility.flip_ctrlpts_u(new_cpts, new_cpts_size, obj.ctrlpts_size_v),
-                            new_cpts_size, obj.ctrlpts_size_v)
+            obj.set_ctrlpts(cpts.tolist(), new_size, size_v)
             obj.knotvector_u = new_kv
 
         # v-direction
         if param[1] > 0:
-            # Get curves
-            new_cpts = []
-            new_cpts_size = 0
-            new_kv = []
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
-            for u in range(obj.ctrlpts_size_u):
-                ccv = [cpts[v + (obj.ctrlpts_size_v * u)] for v in range(obj.ctrlpts_size_v)]
-                ptmp, new_kv = helpers.knot_refinement(obj.degree_v, obj.knotvector_v, ccv, density=param[1])
-                new_cpts_size = len(ptmp)
-                new_cpts += ptmp
+            # Cache geometry properties
+            size_u, size_v = obj.ctrlpts_size_u, obj.ctrlpts_size_v
+            degree_v, knotvector_v = obj.degree_v, obj.knotvector_v
+
+            # Apply knot refinement along the v-axis of the [u][v] grid
+            cpts, new_size, new_kv = _refine_axis(cpts, (size_u, size_v), 1, degree_v, knotvector_v, param[1])
 
             # Update the surface after knot refinement
-            obj.set_ctrlpts(new_cpts, obj.ctrlpts_size_u, new_cpts_size)
+            obj.set_ctrlpts(cpts.tolist(), size_u, new_size)
             obj.knotvector_v = new_kv
 
     # Start volume knot refinement
     if isinstance(obj, abstract.Volume):
         # u-direction
         if param[0] > 0:
-            # Use Pw if rational
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
-
-            # Construct 2-dimensional structure
-            cpt2d = []
-            for u in range(obj.ctrlpts_size_u):
-                temp_surf = []
-                for w in range(obj.ctrlpts_size_w):
-                    for v in range(obj.ctrlpts_size_v):
-                        temp_pt = cpts[v + (u * obj.ctrlpts_size_v) + (w * obj.ctrlpts_size_u * obj.ctrlpts_size_v)]
-                        temp_surf.append(temp_pt)
-                cpt2d.append(temp_surf)
+            # Cache geometry properties
+            size_u, size_v, size_w = obj.ctrlpts_size_u, obj.ctrlpts_size_v, obj.ctrlpts_size_w
+            degree_u, knotvector_u = obj.degree_u, obj.knotvector_u
 
-            # Apply knot refinement
-            ctrlpts_tmp, kv_new = helpers.knot_refinement(obj.degree_u, obj.knotvector_u, cpt2d, density=param[0])
-            new_cpts_size = len(ctrlpts_tmp)
-
-            # Flatten to 1-dimensional structure
-            ctrlpts_new = []
-            for w in range(obj.ctrlpts_size_w):
-                for u in range(new_cpts_size):
-                    for v in range(obj.ctrlpts_size_v):
-                        temp_pt = ctrlpts_tmp[u][v + (w * obj.ctrlpts_size_v)]
-                        ctrlpts_new.append(temp_pt)
+            # Apply knot refinement along the u-axis of the [w][u][v] grid
+            cpts, new_size, new_kv = _refine_axis(cpts, (size_w, size_u, size_v), 1, degree_u, knotvector_u, param[0])
 
-            # Update the volume after knot removal
-            obj.set_ctrlpts(ctrlpts_new, new_cpts_size, obj.ctrlpts_size_v, obj.ctrlpts_size_w)
-            obj.knotvector_u = kv_new
+            # Update the volume after knot refinement
+            obj.set_ctrlpts(cpts.tolist(), new_size, size_v, size_w)
+            obj.knotvector_u = new_kv
 
         # v-direction
         if param[1] > 0:
-            # Use Pw if rational
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
-
-            # Construct 2-dimensional structure
-            cpt2d = []
-            for v in range(obj.ctrlpts_size_v):
-                temp_surf = []
-                for w in range(obj.ctrlpts_size_w):
-                    for u in range(obj.ctrlpts_size_u):
-                        temp_pt = cpts[v + (u * obj.ctrlpts_size_v) + (w * obj.ctrlpts_size_u * obj.ctrlpts_size_v)]
-                        temp_surf.append(temp_pt)
-                cpt2d.append(temp_surf)
+            # Cache geometry properties
+            size_u, size_v, size_w = obj.ctrlpts_size_u, obj.ctrlpts_size_v, obj.ctrlpts_size_w
+            degree_v, knotvector_v = obj.degree_v, obj.knotvector_v
 
-            # Apply knot refinement
-            ctrlpts_tmp, kv_new = helpers.knot_refinement(obj.degree_v, obj.knotvector_v, cpt2d, density=param[1])
-            new_cpts_size = len(ctrlpts_tmp)
-
-            # Flatten to 1-dimensional structure
-            ctrlpts_new = []
-            for w in range(obj.ctrlpts_size_w):
-                for u in range(obj.ctrlpts_size_u):
-                    for v in range(new_cpts_size):
-                        temp_pt = ctrlpts_tmp[v][u + (w * obj.ctrlpts_size_u)]
-                        ctrlpts_new.append(temp_pt)
+            # Apply knot refinement along the v-axis of the [w][u][v] grid
+            cpts, new_size, new_kv = _refine_axis(cpts, (size_w, size_u, size_v), 2, degree_v, knotvector_v, param[1])
 
-            # Update the volume after knot removal
-            obj.set_ctrlpts(ctrlpts_new, obj.ctrlpts_size_u, new_cpts_size, obj.ctrlpts_size_w)
-            obj.knotvector_v = kv_new
+            # Update the volume after knot refinement
+            obj.set_ctrlpts(cpts.tolist(), size_u, new_size, size_w)
+            obj.knotvector_v = new_kv
 
         # w-direction
         if param[2] > 0:
-            # Use Pw if rational
-            cpts = obj.ctrlptsw if obj.rational else obj.ctrlpts
-
-            # Construct 2-dimensional structure
-            cpt2d = []
-            for w in range(obj.ctrlpts_size_w):
-                temp_surf = [cpts[uv + (w * obj.ctrlpts_size_u * obj.ctrlpts_size_v)] for uv in
-                             range(obj.ctrlpts_size_u * obj.ctrlpts_size_v)]
-                cpt2d.append(temp_surf)
+            # Cache geometry properties
+            size_u, size_v, size_w = obj.ctrlpts_size_u, obj.ctrlpts_size_v, obj.ctrlpts_size_w
+            degree_w, knotvector_w = obj.degree_w, obj.knotvector_w
 
-            # Apply knot refinement
-            ctrlpts_tmp, kv_new = helpers.knot_refinement(obj.degree_w, obj.knotvector_w, cpt2d, density=param[2])
-            new_cpts_size = len(ctrlpts_tmp)
-
-            # Flatten to 1-dimensional structure
-            ctrlpts_new = []
-            for w in range(new_cpts_size):
-                ctrlpts_new += ctrlpts_tmp[w]
+            # Apply knot refinement along the w-axis of the [w][u][v] grid
+            cpts, new_size, new_kv = _refine_axis(cpts, (size_w, size_u, size_v), 0, degree_w, knotvector_w, param[2])
 
-            # Update the volume after knot removal
-            obj.set_ctrlpts(ctrlpts_new, obj.ctrlpts_size_u, obj.ctrlpts_size_v, new_cpts_size)
-            obj.knotvector_w = kv_new
+            # Update the volume after knot refinement
+            obj.set_ctrlpts(cpts.tolist(), size_u, size_v, new_size)
+            obj.knotvector_w = new_kv
 
     # Return updated spline geometry
     return obj
@@ -802,7 +958,8 @@ def degree_operations(obj, param, **kwargs):
                     new_cpts = helpers.degree_elevation(crv.degree, cpts, num=param[0])
                     crv.degree += param[0]
                     crv.set_ctrlpts(new_cpts)
-                    crv.knotvector = [crv.knotvector[0] for _ in range(param[0])] + list(crv.knotvector) + [crv.knotvector[-1] for _ in range(param[0])]
+                    kv = crv.knotvector
+                    crv.knotvector = [kv[0]] * param[0] + list(kv) + [kv[-1]] * param[0]
 
                 # Compute new degree
                 nd = obj.degree + param[0]
@@ -954,9 +1111,7 @@ def split_curve(obj, param, **kwargs):
     knot_span = span_func(temp_obj.degree, temp_obj.knotvector, len(temp_obj.ctrlpts), param) + 1
     curve1_kv = list(temp_obj.knotvector[0:knot_span])
     curve1_kv.append(param)
-    curve2_kv = list(temp_obj.knotvector[knot_span:])
-    for _ in range(0, temp_obj.degree + 1):
-        curve2_kv.insert(0, param)
+    curve2_kv = [param] * (temp_obj.degree + 1) + list(temp_obj.knotvector[knot_span:])
 
     # Control points (use Pw if rational)
     cpts = temp_obj.ctrlptsw if obj.rational else temp_obj.ctrlpts
@@ -1117,9 +1272,7 @@ def split_surface_u(obj, param, **kwargs):
     knot_span = span_func(temp_obj.degree_u, temp_obj.knotvector_u, temp_obj.ctrlpts_size_u, param) + 1
     surf1_kv = list(temp_obj.knotvector_u[0:knot_span])
     surf1_kv.append(param)
-    surf2_kv = list(temp_obj.knotvector_u[knot_span:])
-    for _ in range(0, temp_obj.degree_u + 1):
-        surf2_kv.insert(0, param)
+    surf2_kv = [param] * (temp_obj.degree_u + 1) + list(temp_obj.knotvector_u[knot_span:])
 
     # Control points
     surf1_ctrlpts = temp_obj.ctrlpts2d[0:ks + r]
@@ -1190,19 +1343,12 @@ def split_surface_v(obj, param, **kwargs):
     knot_span = span_func(temp_obj.degree_v, temp_obj.knotvector_v, temp_obj.ctrlpts_size_v, param) + 1
     surf1_kv = list(temp_obj.knotvector_v[0:knot_span])
     surf1_kv.append(param)
-    surf2_kv = list(temp_obj.knotvector_v[knot_span:])
-    for _ in range(0, temp_obj.degree_v + 1):
-        surf2_kv.insert(0, param)
+    surf2_kv = [param] * (temp_obj.degree_v + 1) + list(temp_obj.knotvector_v[knot_span:])
 
     # Control points
-    surf1_ctrlpts = []
-    for v_row in temp_obj.ctrlpts2d:
-        temp = v_row[0:ks + r]
-        surf1_ctrlpts.append(temp)
-    surf2_ctrlpts = []
-    for v_row in temp_obj.ctrlpts2d:
-        temp = v_row[ks + r - 1:]
-        surf2_ctrlpts.append(temp)
+    ctrlpts2d = temp_obj.ctrlpts2d
+    surf1_ctrlpts = [v_row[0:ks + r] for v_row in ctrlpts2d]
+    surf2_ctrlpts = [v_row[ks + r - 1:] for v_row in ctrlpts2d]
 
     # Create a new surface for the first half
     surf1 = temp_obj.__class__()
@@ -1354,6 +1500,72 @@ def derivative_surface(obj):
     return surf_u, surf_v, surf_uv
 
 
+def _find_ctrlpts_curve(obj, u, v, kwargs):
+    """ Implementation of :func:`find_ctrlpts` for curves. """
+    return ops.find_ctrlpts_curve(u, obj, **kwargs)
+
+
+def _find_ctrlpts_surface(obj, u, v, kwargs):
+    """ Implementation of :func:`find_ctrlpts` for surfaces. """
+    if v is None:
+        raise GeomdlException("Parameter value for the v-direction must be set for operating on surfaces")
+    return ops.find_ctrlpts_surface(u, v, obj, **kwargs)
+
+
+def _find_ctrlpts_curve_batch(obj, u, v):
+    """ Implementation of :func:`find_ctrlpts_batch` for curves. """
+    cpts = _ctrlpts_array(obj)
+    if obj.rational:
+        # Curve control points are used without the weights, as in find_ctrlpts
+        cpts = np.ascontiguousarray(cpts[:, :-1] / cpts[:, -1:])
+    return nbops.find_ctrlpts_curve_batch(obj.degree, np.asarray(obj.knotvector, dtype=np.float64), cpts,
+                                          np.asarray(u, dtype=np.float64).reshape(-1))
+
+
+def _find_ctrlpts_surface_batch(obj, u, v):
+    """ Implementation of :func:`find_ctrlpts_batch` for surfaces. """
+    if v is None:
+        raise GeomdlException("Parameter values for the v-direction must be set for operating on surfaces")
+    params_u = np.asarray(u, dtype=np.float64).reshape(-1)
+    params_v = np.asarray(v, dtype=np.float64).reshape(-1)
+    if params_u.shape != params_v.shape:
+        raise GeomdlException("The number of parameters on the u- and v-directions must be the same",
+                              data=dict(num_u=params_u.size, num_v=params_v.size))
+    cpts = _ctrlpts_array(obj).reshape(obj.ctrlpts_size_u, obj.ctrlpts_size_v, -1)
+    return nbops.find_ctrlpts_surface_batch(obj.degree_u, obj.degree_v,
+                                            np.asarray(obj.knotvector_u, dtype=np.float64),
+                                            np.asarray(obj.knotvector_v, dtype=np.float64), cpts, params_u, params_v)
+
+
+# Scalar and batch find_ctrlpts implementations keyed by the geometry type; subclasses are added on their first lookup
+_FIND_CTRLPTS_DISPATCH = {
+    abstract.Curve: (_find_ctrlpts_curve, _find_ctrlpts_curve_batch),
+    abstract.Surface: (_find_ctrlpts_surface, _find_ctrlpts_surface_batch),
+}
+
+
+def _find_ctrlpts_funcs(obj_type):
+    """ Finds the :func:`find_ctrlpts` and :func:`find_ctrlpts_batch` implementations for the input geometry type.
+
+    :param obj_type: geometry type
+    :type obj_type: type
+    :return: scalar and batch implementation functions
+    :rtype: tuple
+    """
+    try:
+        return _FIND_CTRLPTS_DISPATCH[obj_type]
+    except KeyError:
+        pass
+
+    # Walk the class hierarchy and memoize the result for the next calls
+    for base in obj_type.__mro__[1:]:
+        funcs = _FIND_CTRLPTS_DISPATCH.get(base)
+        if funcs is not None:
+            _FIND_CTRLPTS_DISPATCH[obj_type] = funcs
+            return funcs
+    raise GeomdlException("The input must be an instance of abstract.Curve or abstract.Surface")
+
+
 @export
 def find_ctrlpts(obj, u, v=None, **kwargs):
     """ Finds the control points involved in the evaluation of the curve/surface point defined by the input parameter(s).
@@ -1367,14 +1579,27 @@ def find_ctrlpts(obj, u, v=None, **kwargs):
     :return: control points; 1-dimensional array for curve, 2-dimensional array for surface
     :rtype: list
     """
-    if isinstance(obj, abstract.Curve):
-        return ops.find_ctrlpts_curve(u, obj, **kwargs)
-    elif isinstance(obj, abstract.Surface):
-        if v is None:
-            raise GeomdlException("Parameter value for the v-direction must be set for operating on surfaces")
-        return ops.find_ctrlpts_surface(u, v, obj, **kwargs)
-    else:
-        raise GeomdlException("The input must be an instance of abstract.Curve or abstract.Surface")
+    return _find_ctrlpts_funcs(type(obj))[0](obj, u, v, kwargs)
+
+
+@export
+def find_ctrlpts_batch(obj, u, v=None):
+    """ Finds the control points involved in the evaluation of the curve/surface points defined by the input parameters.
+
+    Batch version of :func:`find_ctrlpts`. The knot spans are found and the control points are collected for all
+    parameters in a single compiled loop.
+
+    :param obj: curve or surface
+    :type obj: abstract.Curve or abstract.Surface
+    :param u: parameters (for curve), parameters on the u-direction (for surface)
+    :type u: list, tuple, numpy.ndarray
+    :param v: parameters on the v-direction (for surface only)
+    :type v: list, tuple, numpy.ndarray
+    :return: control points; [num_params][degree + 1][dimension] array for curve,
+        [num_params][degree_u + 1][degree_v + 1][dimension] array for surface
+    :rtype: numpy.ndarray
+    """
+    return _find_ctrlpts_funcs(type(obj))[1](obj, u, v)
 
 
 @export
@@ -1529,7 +1754,7 @@ def rotate(obj, angle, **kwargs):
 
         # Then, rotate about the axis
         rot = math.radians(alpha)
-        new_ctrlpts = [list(ncs.ctrlpts[i]) for i in range(len(ncs.ctrlpts))]
+        new_ctrlpts = [list(pt) for pt in ncs.ctrlpts]
         for idx, pt in enumerate(ncs.ctrlpts):
             new_ctrlpts[idx][0] = (pt[0] * math.cos(rot)) - (pt[1] * math.sin(rot))
             new_ctrlpts[idx][1] = (pt[1] * math.cos(rot)) + (pt[0] * math.sin(rot))
@@ -1628,20 +1853,15 @@ def transpose(surf, **kwargs):
         degree_v_new = g.degree_u
         kv_u_new = g.knotvector_v
         kv_v_new = g.knotvector_u
-        ctrlpts2d_old = g.ctrlpts2d
+        size_u, size_v = g.ctrlpts_size_u, g.ctrlpts_size_v
 
-        # Find new control points
-        ctrlpts2d_new = []
-        for v in range(0, g.ctrlpts_size_v):
-            ctrlpts_u = []
-            for u in range(0, g.ctrlpts_size_u):
-                temp = ctrlpts2d_old[u][v]
-                ctrlpts_u.append(temp)
-            ctrlpts2d_new.append(ctrlpts_u)
+        # Find new control points by swapping the axes of the [u][v] grid
+        cpts = _ctrlpts_array(g)
+        ctrlpts_new = cpts.reshape(size_u, size_v, -1).transpose(1, 0, 2).reshape(size_u * size_v, -1)
 
         g.degree_u = degree_u_new
         g.degree_v = degree_v_new
-        g.ctrlpts2d = ctrlpts2d_new
+        g.set_ctrlpts(ctrlpts_new.tolist(), size_v, size_u)
         g.knotvector_u = kv_u_new
         g.knotvector_v = kv_v_new
 
@@ -0,0 +1,395 @@
+"""
+.. module:: _operations_numba
+    :platform: Unix, Windows
+    :synopsis: Provides Numba-compiled kernels for the geometric operations
+
+The kernels are compiled lazily on their first call and the machine code is cached on disk (``cache=True``), so that
+importing this module is cheap. The first call of each kernel in a fresh environment takes a few seconds to compile;
+the later calls, including the ones from other processes, load the cached code.
+
+"""
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True)
+def knot_insertion_alpha(degree, knotvector, u, num, s, span):
+    """ Computes the knot insertion coefficients (alpha) for all insertion steps.
+
+    The coefficients only depend on the knot vector, so they can be shared between the curves of a surface or a volume.
+
+    :param degree: degree
+    :type degree: int
+    :param knotvector: knot vector
+    :type knotvector: numpy.ndarray
+    :param u: knot to be inserted
+    :type u: float
+    :param num: number of knot insertions
+    :type num: int
+    :param s: multiplicity of the knot
+    :type s: int
+    :param span: knot span
+    :type span: int
+    :return: alpha values in [num][degree - s] format, i.e. alpha[j - 1][i] is used in the j-th insertion step
+    :rtype: numpy.ndarray
+    """
+    # The knot insertion kernels call this function before processing the curves, so it also guards them
+    if num > degree - s:
+        raise ValueError("The knot cannot be inserted more than (degree - multiplicity) times")
+
+    alpha = np.zeros((num, degree - s))
+    for j in range(1, num + 1):
+        L = span - degree + j
+        for i in range(0, degree - j - s + 1):
+            alpha[j - 1, i] = (u - knotvector[L + i]) / (knotvector[i + span + 1] - knotvector[L + i])
+    return alpha
+
+
+@njit(inline='always')
+def _knot_insertion_curve(degree, dim, alpha, pts, pts_new, num, s, span):
+    """ Computes the control points of a single curve after knot insertion (in-place on ``pts_new``).
+
+    Inlined into the kernels, so that a constant degree and dimension let the loops be fully unrolled. The blend of
+    the consecutive points is written as ``P[i] + alpha * (P[i + 1] - P[i])`` to be contracted into a fused
+    multiply-add.
+    """
+    num_ctrlpts = pts.shape[0]
+    temp = np.empty((degree + 1, dim))
+
+    # Save unaltered control points
+    for i in range(0, span - degree + 1):
+        for d in range(dim):
+            pts_new[i, d] = pts[i, d]
+    for i in range(span - s, num_ctrlpts):
+        for d in range(dim):
+            pts_new[i + num, d] = pts[i, d]
+
+    # Fill the local array which will be used to update control points during knot insertion
+    for i in range(0, degree - s + 1):
+        for d in range(dim):
+            temp[i, d] = pts[span - degree + i, d]
+
+    # Insert knot "num" times
+    for j in range(1, num + 1):
+        L = span - degree + j
+        for i in range(0, degree - j - s + 1):
+            a = alpha[j - 1, i]
+            for d in range(dim):
+                temp[i, d] = temp[i, d] + a * (temp[i + 1, d] - temp[i, d])
+        for d in range(dim):
+            pts_new[L, d] = temp[0, d]
+            pts_new[span + num - j - s, d] = temp[degree - j - s, d]
+
+    # Load remaining control points
+    L = span - degree + num
+    for i in range(L + 1, span - s):
+        for d in range(dim):
+            pts_new[i, d] = temp[i - L, d]
+
+
+@njit(cache=True, parallel=True, fastmath={'contract'})
+def knot_insertion_curves(degree, knotvector, ctrlpts, u, num, s, span):
+    """ Computes the control points of a batch of iso-curves after knot insertion.
+
+    Part of Algorithm A5.1 of The NURBS Book by Piegl & Tiller, 2nd Edition. All curves in the batch share the same
+    degree and knot vector, so each curve is processed independently of the others.
+
+    :param degree: degree
+    :type degree: int
+    :param knotvector: knot vector
+    :type knotvector: numpy.ndarray
+    :param ctrlpts: control points in [num_curves][num_ctrlpts][dimension] format
+    :type ctrlpts: numpy.ndarray
+    :param u: knot to be inserted
+    :type u: float
+    :param num: number of knot insertions
+    :type num: int
+    :param s: multiplicity of the knot
+    :type s: int
+    :param span: knot span
+    :type span: int
+    :return: updated control points in [num_curves][num_ctrlpts + num][dimension] format
+    :rtype: numpy.ndarray
+    """
+    num_curves, num_ctrlpts, dim = ctrlpts.shape
+    ctrlpts_new = np.empty((num_curves, num_ctrlpts + num, dim))
+
+    # All curves share the same knot vector, so compute the coefficients only once
+    alpha = knot_insertion_alpha(degree, knotvector, u, num, s, span)
+
+    for c in prange(num_curves):
+        _knot_insertion_curve(degree, dim, alpha, ctrlpts[c], ctrlpts_new[c], num, s, span)
+
+    return ctrlpts_new
+
+
+def _make_knot_insertion_kernel(degree, dim):
+    """ Generates a :func:`knot_insertion_curves` kernel for a fixed degree and dimension of the control points.
+
+    Both the degree and the dimension are compile-time constants of the generated kernel, so the loops over them are
+    fully unrolled. The kernel is compiled on its first call, like the other kernels of this module.
+
+    :param degree: degree
+    :type degree: int
+    :param dim: dimension of the control points
+    :type dim: int
+    :return: compiled kernel with the same arguments as :func:`knot_insertion_curves` except ``degree``
+    """
+    @njit(cache=True, parallel=True, fastmath={'contract'})
+    def kernel(knotvector, ctrlpts, u, num, s, span):
+        num_curves, num_ctrlpts = ctrlpts.shape[0], ctrlpts.shape[1]
+        ctrlpts_new = np.empty((num_curves, num_ctrlpts + num, dim))
+
+        # All curves share the same knot vector, so compute the coefficients only once
+        alpha = knot_insertion_alpha(degree, knotvector, u, num, s, span)
+
+        for c in prange(num_curves):
+            _knot_insertion_curve(degree, dim, alpha, ctrlpts[c], ctrlpts_new[c], num, s, span)
+
+        return ctrlpts_new
+
+    return kernel
+
+
+# Knot insertion kernel for cubic rational 3-dimensional geometries, i.e. weighted control points (x*w, y*w, z*w, w)
+knot_insertion_curves_p3_d4 = _make_knot_insertion_kernel(3, 4)
+
+
+@njit(cache=True)
+def find_span_linear(degree, knot_vector, num_ctrlpts, knot):
+    """ Finds the span of a single knot over the knot vector using linear search.
+
+    Compiled version of :func:`.helpers.find_span_linear`.
+
+    :param degree: degree, :math:`p`
+    :type degree: int
+    :param knot_vector: knot vector, :math:`U`
+    :type knot_vector: numpy.ndarray
+    :param num_ctrlpts: number of control points, :math:`n + 1`
+    :type num_ctrlpts: int
+    :param knot: knot or parameter, :math:`u`
+    :type knot: float
+    :return: knot span
+    :rtype: int
+    """
+    span = degree + 1  # Knot span index starts from zero
+    while span < num_ctrlpts and knot_vector[span] <= knot:
+        span += 1
+
+    return span - 1
+
+
+@njit(cache=True)
+def knot_refinement_kv(degree, knotvector, num_ctrlpts, knots):
+    """ Computes the knot vector after knot refinement.
+
+    Part of Algorithm A5.4 of The NURBS Book by Piegl & Tiller, 2nd Edition.
+
+    :param degree: degree
+    :type degree: int
+    :param knotvector: knot vector
+    :type knotvector: numpy.ndarray
+    :param num_ctrlpts: number of control points
+    :type num_ctrlpts: int
+    :param knots: sorted list of knots to be inserted, :math:`X`
+    :type knots: numpy.ndarray
+    :return: updated knot vector
+    :rtype: numpy.ndarray
+    """
+    r = knots.shape[0] - 1
+    n = num_ctrlpts - 1
+    m = n + degree + 1
+    a = find_span_linear(degree, knotvector, n, knots[0])
+    b = find_span_linear(degree, knotvector, n, knots[r]) + 1
+
+    new_kv = np.zeros(m + r + 2)
+
+    # Fill unchanged knots
+    for j in range(0, a + 1):
+        new_kv[j] = knotvector[j]
+    for j in range(b + degree, m + 1):
+        new_kv[j + r + 1] = knotvector[j]
+
+    # Merge the knots to be inserted
+    i = b + degree - 1
+    k = b + degree + r
+    j = r
+    while j >= 0:
+        while knots[j] <= knotvector[i] and i > a:
+            new_kv[k] = knotvector[i]
+            k -= 1
+            i -= 1
+        new_kv[k] = knots[j]
+        k = k - 1
+        j -= 1
+
+    return new_kv
+
+
+@njit(inline='always')
+def _knot_refinement_curve(degree, dim, knotvector, new_kv, knots, tol, pts, pts_new):
+    """ Computes the control points of a single curve after knot refinement (in-place on ``pts_new``).
+
+    Inlined into the kernels; ``new_kv`` is the output of :func:`knot_refinement_kv`. The blend of the consecutive
+    points is written as ``P[i] + alpha * (P[i - 1] - P[i])`` to be contracted into a fused multiply-add.
+    """
+    r = knots.shape[0] - 1
+    n = pts.shape[0] - 1
+    a = find_span_linear(degree, knotvector, n, knots[0])
+    b = find_span_linear(degree, knotvector, n, knots[r]) + 1
+
+    # Fill unchanged control points
+    for j in range(0, a - degree + 1):
+        for d in range(dim):
+            pts_new[j, d] = pts[j, d]
+    for j in range(b - 1, n + 1):
+        for d in range(dim):
+            pts_new[j + r + 1, d] = pts[j, d]
+
+    # Initialize variables for knot refinement
+    i = b + degree - 1
+    k = b + degree + r
+    j = r
+
+    # Apply knot refinement
+    while j >= 0:
+        while knots[j] <= knotvector[i] and i > a:
+            for d in range(dim):
+                pts_new[k - degree - 1, d] = pts[i - degree - 1, d]
+            k -= 1
+            i -= 1
+        for d in range(dim):
+            pts_new[k - degree - 1, d] = pts_new[k - degree, d]
+        for l in range(1, degree + 1):
+            idx = k - degree + l
+            alpha = new_kv[k + l] - knots[j]
+            if abs(alpha) < tol:
+                for d in range(dim):
+                    pts_new[idx - 1, d] = pts_new[idx, d]
+            else:
+                alpha = alpha / (new_kv[k + l] - knotvector[i - degree + l])
+                for d in range(dim):
+                    pts_new[idx - 1, d] = pts_new[idx, d] + alpha * (pts_new[idx - 1, d] - pts_new[idx, d])
+        k = k - 1
+        j -= 1
+
+
+@njit(cache=True, parallel=True, fastmath={'contract'})
+def knot_refinement_curves(degree, knotvector, ctrlpts, knots, tol):
+    """ Computes the knot vector and the control points of a batch of curves after knot refinement.
+
+    Implementation of Algorithm A5.4 of The NURBS Book by Piegl & Tiller, 2nd Edition. All curves in the batch share
+    the same degree and knot vector, so the new knot vector is computed once and the curves are processed in parallel.
+
+    :param degree: degree
+    :type degree: int
+    :param knotvector: knot vector
+    :type knotvector: numpy.ndarray
+    :param ctrlpts: control points in [num_curves][num_ctrlpts][dimension] format
+    :type ctrlpts: numpy.ndarray
+    :param knots: sorted list of knots to be inserted, :math:`X`
+    :type knots: numpy.ndarray
+    :param tol: tolerance value for zero equality checking
+    :type tol: float
+    :return: updated control points and knot vector
+    :rtype: tuple
+    """
+    num_curves, num_ctrlpts, dim = ctrlpts.shape
+    new_kv = knot_refinement_kv(degree, knotvector, num_ctrlpts, knots)
+    new_ctrlpts = np.empty((num_curves, num_ctrlpts + knots.shape[0], dim))
+
+    for c in prange(num_curves):
+        _knot_refinement_curve(degree, dim, knotvector, new_kv, knots, tol, ctrlpts[c], new_ctrlpts[c])
+
+    return new_ctrlpts, new_kv
+
+
+def _make_knot_refinement_kernel(dim):
+    """ Generates a :func:`knot_refinement_curves` kernel for a fixed dimension of the control points.
+
+    The dimension is a compile-time constant of the generated kernel, so the loops over the coordinates are fully
+    unrolled.
+
+    :param dim: dimension of the control points
+    :type dim: int
+    :return: compiled kernel with the same arguments and return value as :func:`knot_refinement_curves`
+    """
+    @njit(cache=True, parallel=True, fastmath={'contract'})
+    def kernel(degree, knotvector, ctrlpts, knots, tol):
+        num_curves, num_ctrlpts = ctrlpts.shape[0], ctrlpts.shape[1]
+        new_kv = knot_refinement_kv(degree, knotvector, num_ctrlpts, knots)
+        new_ctrlpts = np.empty((num_curves, num_ctrlpts + knots.shape[0], dim))
+
+        for c in prange(num_curves):
+            _knot_refinement_curve(degree, dim, knotvector, new_kv, knots, tol, ctrlpts[c], new_ctrlpts[c])
+
+        return new_ctrlpts, new_kv
+
+    return kernel
+
+
+# Knot refinement kernels for non-rational and rational 3-dimensional geometries
+knot_refinement_curves_d3 = _make_knot_refinement_kernel(3)
+knot_refinement_curves_d4 = _make_knot_refinement_kernel(4)
+
+
+@njit(cache=True, parallel=True)
+def find_ctrlpts_curve_batch(degree, knotvector, ctrlpts, params):
+    """ Finds the control points involved in the evaluation of the curve points defined by the input parameters.
+
+    Batch version of :func:`.operations.find_ctrlpts` for curves.
+
+    :param degree: degree
+    :type degree: int
+    :param knotvector: knot vector
+    :type knotvector: numpy.ndarray
+    :param ctrlpts: control points in [num_ctrlpts][dimension] format
+    :type ctrlpts: numpy.ndarray
+    :param params: parameters
+    :type params: numpy.ndarray
+    :return: control points in [num_params][degree + 1][dimension] format
+    :rtype: numpy.ndarray
+    """
+    num_ctrlpts, dim = ctrlpts.shape
+    ctrlpts_out = np.empty((params.shape[0], degree + 1, dim))
+
+    for i in prange(params.shape[0]):
+        span = find_span_linear(degree, knotvector, num_ctrlpts, params[i])
+        ctrlpts_out[i] = ctrlpts[span - degree:span + 1]
+
+    return ctrlpts_out
+
+
+@njit(cache=True, parallel=True)
+def find_ctrlpts_surface_batch(degree_u, degree_v, knotvector_u, knotvector_v, ctrlpts, params_u, params_v):
+    """ Finds the control points involved in the evaluation of the surface points defined by the input parameters.
+
+    Batch version of :func:`.operations.find_ctrlpts` for surfaces.
+
+    :param degree_u: degree on the u-direction
+    :type degree_u: int
+    :param degree_v: degree on the v-direction
+    :type degree_v: int
+    :param knotvector_u: knot vector on the u-direction
+    :type knotvector_u: numpy.ndarray
+    :param knotvector_v: knot vector on the v-direction
+    :type knotvector_v: numpy.ndarray
+    :param ctrlpts: control points in [size_u][size_v][dimension] format
+    :type ctrlpts: numpy.ndarray
+    :param params_u: parameters on the u-direction
+    :type params_u: numpy.ndarray
+    :param params_v: parameters on the v-direction
+    :type params_v: numpy.ndarray
+    :return: control points in [num_params][degree_u + 1][degree_v + 1][dimension] format
+    :rtype: numpy.ndarray
+    """
+    size_u, size_v, dim = ctrlpts.shape
+    ctrlpts_out = np.empty((params_u.shape[0], degree_u + 1, degree_v + 1, dim))
+
+    for i in prange(params_u.shape[0]):
+        span_u = find_span_linear(degree_u, knotvector_u, size_u, params_u[i])
+        span_v = find_span_linear(degree_v, knotvector_v, size_v, params_v[i])
+        ctrlpts_out[i] = ctrlpts[span_u - degree_u:span_u + 1, span_v - degree_v:span_v + 1]
+
+    return ctrlpts_out